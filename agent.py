@@ -16,7 +16,8 @@ from config.utils import (
     logger,
     save_json,
     deduplicate_companies,
-    timestamp_now
+    timestamp_now,
+    map_concurrently
 )
 from config.prompts import (
     SYSTEM_PLANNER_PROMPT,
@@ -25,7 +26,11 @@ from config.prompts import (
     EMAIL_GENERATION_SYSTEM_PROMPT,
     EMAIL_GENERATION_USER_PROMPT_TEMPLATE
 )
-from tools.web_search import SearchClient, find_decision_makers_for_company
+from tools.web_search import (
+    SearchClient,
+    find_decision_makers_batch,
+    search_results_to_dicts
+)
 from tools.clinical_trials import fetch_clinical_trials_for_query
 
 
@@ -49,11 +54,13 @@ class ConvexiaCRMAgent:
         search_client: Optional[SearchClient] = None,
         max_companies: Optional[int] = None,
         output_dir: Optional[Path] = None,
+        email_concurrency: Optional[int] = None,
     ):
         self.llm = llm_client or LLMClient()
         self.search = search_client or SearchClient()
         self.max_companies = max_companies or config.max_companies
         self.output_dir = output_dir or config.output_dir
+        self.email_concurrency = email_concurrency or config.max_workers
         
         logger.info(f"Initialized ConvexiaCRMAgent (max_companies={self.max_companies})")
     
@@ -168,15 +175,7 @@ class ConvexiaCRMAgent:
             )
             
             # Convert to dict format
-            results_dicts = [
-                {
-                    "title": r.title,
-                    "url": r.url,
-                    "snippet": r.snippet,
-                    "source": r.source
-                }
-                for r in results
-            ]
+            results_dicts = search_results_to_dicts(results)
             
             logger.info(f"[{run_id}] Web search returned {len(results_dicts)} results")
             return results_dicts
@@ -274,36 +273,27 @@ class ConvexiaCRMAgent:
         """Add decision makers via LinkedIn search"""
         logger.info(f"[{run_id}] Enriching with decision makers...")
         
-        for idx, company in enumerate(companies, 1):
+        # Searches are independent, so run them concurrently
+        dms_by_company = find_decision_makers_batch(
+            [company.company_name for company in companies],
+            max_people=config.max_decision_makers_per_company,
+            client=self.search
+        )
+        
+        for company in companies:
+            # Convert to DecisionMaker objects
+            for dm_dict in dms_by_company.get(company.company_name, []):
+                try:
+                    dm = DecisionMaker(**dm_dict)
+                    company.decision_makers.append(dm)
+                except Exception as e:
+                    logger.warning(f"Invalid decision maker data: {e}")
+                    continue
+            
             logger.info(
-                f"[{run_id}] [{idx}/{len(companies)}] "
-                f"Finding decision makers for {company.company_name}"
+                f"[{run_id}] Found {len(company.decision_makers)} "
+                f"decision makers for {company.company_name}"
             )
-            
-            try:
-                dms_data = find_decision_makers_for_company(
-                    company_name=company.company_name,
-                    website=company.website,
-                    max_people=config.max_decision_makers_per_company
-                )
-                
-                # Convert to DecisionMaker objects
-                for dm_dict in dms_data:
-                    try:
-                        dm = DecisionMaker(**dm_dict)
-                        company.decision_makers.append(dm)
-                    except Exception as e:
-                        logger.warning(f"Invalid decision maker data: {e}")
-                        continue
-                
-                logger.info(
-                    f"[{run_id}] Found {len(company.decision_makers)} "
-                    f"decision makers for {company.company_name}"
-                )
-                
-            except Exception as e:
-                logger.warning(f"[{run_id}] DM search failed for {company.company_name}: {e}")
-                continue
         
         return companies
     
@@ -378,21 +368,38 @@ class ConvexiaCRMAgent:
         from_title: str = "Co-founder",
         from_company: str = "Convexia Bio"
     ) -> List[EmailOutreach]:
-        """Generate personalized outreach emails for all decision makers"""
+        """
+        Generate personalized outreach emails for all decision makers
+        
+        Each email is an independent LLM call, so drafts are generated on a
+        thread pool of email_concurrency workers; the shared rate limiter
+        still caps the request rate. Emails are returned in input order.
+        """
         logger.info("Generating personalized emails...")
         
-        emails = []
-        for company in companies:
-            for dm in company.decision_makers:
-                try:
-                    email = self._generate_single_email(
-                        company, dm, from_name, from_title, from_company
-                    )
-                    if email:
-                        emails.append(email)
-                except Exception as e:
-                    logger.warning(f"Email generation failed for {dm.name}: {e}")
-                    continue
+        recipients = [
+            (company, dm)
+            for company in companies
+            for dm in company.decision_makers
+        ]
+        if not recipients:
+            logger.info("Generated 0 emails")
+            return []
+        
+        def _draft_one(recipient: Tuple[Company, DecisionMaker]) -> EmailOutreach:
+            company, dm = recipient
+            return self._generate_single_email(
+                company, dm, from_name, from_title, from_company
+            )
+        
+        drafts = map_concurrently(
+            _draft_one,
+            recipients,
+            self.email_concurrency,
+            task="Email generation",
+            describe=lambda recipient: recipient[1].name
+        )
+        emails = [email for email in drafts if email]
         
         logger.info(f"Generated {len(emails)} emails")
         return emails
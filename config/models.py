@@ -3,6 +3,8 @@ Pydantic models for data validation and structure
 Ensures data consistency and type safety throughout the pipeline
 """
 
+import sys
+from dataclasses import dataclass
 from typing import List, Optional, Literal
 from datetime import datetime
 from pydantic import BaseModel, Field, HttpUrl, validator
@@ -180,16 +182,25 @@ class EmailOutreach(BaseModel):
         }
 
 
-class SearchResult(BaseModel):
-    """Model for web search results"""
+# dataclass(slots=...) is only available on Python 3.10+
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_SLOTS)
+class SearchResult:
+    """
+    Model for web search results
+    
+    A frozen dataclass (slotted on Python 3.10+) rather than a pydantic
+    model: search results are created in bulk and only need the URL
+    check below.
+    """
     title: str
     url: str
     snippet: str
     source: str = "web"
     relevance_score: Optional[float] = None
     
-    @validator("url")
-    def validate_url(cls, v):
-        if not validators.url(v):
-            raise ValueError(f"Invalid URL: {v}")
-        return v
+    def __post_init__(self):
+        if not validators.url(self.url):
+            raise ValueError(f"Invalid URL: {self.url}")
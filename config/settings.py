@@ -5,9 +5,9 @@ Handles environment variables, validation, and defaults
 
 import os
 from pathlib import Path
-from typing import Literal, Optional
+from typing import Dict, Literal, Optional
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, conint, validator
 
 # Load environment variables from .env file
 load_dotenv()
@@ -46,10 +46,13 @@ class Config(BaseModel):
     max_decision_makers_per_company: int = Field(default=5, ge=1, le=20)
     max_retries: int = Field(default=3, ge=0, le=10)
     rate_limit_rpm: int = Field(default=10, ge=1, le=60)
+    provider_rate_limits: Dict[str, conint(ge=1)] = Field(default_factory=dict)  # Per-host RPM overrides
+    max_workers: int = Field(default=5, ge=1, le=32)  # Concurrent network-bound tasks
     
     # Caching
     enable_cache: bool = Field(default=True)
     cache_expiry_hours: int = Field(default=24, ge=1, le=168)
+    cache_size_limit_mb: int = Field(default=1024, ge=16)
     
     # LLM settings
     llm_temperature: float = Field(default=0.1, ge=0.0, le=2.0)
@@ -105,10 +108,18 @@ class Config(BaseModel):
             data["enable_cache"] = cache_env.lower() in ("true", "1", "yes")
         if "cache_expiry_hours" not in data:
             data["cache_expiry_hours"] = int(os.getenv("CACHE_EXPIRY_HOURS", "24"))
+        if "cache_size_limit_mb" not in data:
+            data["cache_size_limit_mb"] = int(os.getenv("CACHE_SIZE_LIMIT_MB", "1024"))
         if "max_retries" not in data:
             data["max_retries"] = int(os.getenv("MAX_RETRIES", "3"))
         if "rate_limit_rpm" not in data:
             data["rate_limit_rpm"] = int(os.getenv("RATE_LIMIT_RPM", "10"))
+        if "provider_rate_limits" not in data:
+            data["provider_rate_limits"] = _parse_provider_rate_limits(
+                os.getenv("PROVIDER_RATE_LIMITS", "")
+            )
+        if "max_workers" not in data:
+            data["max_workers"] = int(os.getenv("MAX_WORKERS", "5"))
             
         super().__init__(**data)
         
@@ -117,5 +128,25 @@ class Config(BaseModel):
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.log_dir.mkdir(parents=True, exist_ok=True)
 
+def _parse_provider_rate_limits(value: str) -> Dict[str, int]:
+    """
+    Parse PROVIDER_RATE_LIMITS, e.g. "serpapi.com=10,google.serper.dev=60"
+    
+    RPM bounds are enforced by the provider_rate_limits field.
+    """
+    limits = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        host, _, rpm = item.partition("=")
+        host, rpm = host.strip().lower(), rpm.strip()
+        if not host or not rpm.isdigit():
+            raise ValueError(
+                f"Invalid PROVIDER_RATE_LIMITS entry {item.strip()!r}, "
+                "expected host=requests_per_minute"
+            )
+        limits[host] = int(rpm)
+    return limits
+
 # Global config instance
 config = Config()
@@ -2,20 +2,31 @@
 Utility functions for caching, logging, retries, and data processing
 """
 
+import atexit
 import json
 import hashlib
+import inspect
 import logging
-from datetime import datetime, timedelta
+import pickle
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Any, Callable, Optional
+from urllib.parse import urlparse
+from typing import Any, Callable, Dict, Iterable, List, Optional
 from functools import wraps
+from concurrent.futures import Future, ThreadPoolExecutor
 import time
+import threading
 
+import requests
+from requests.adapters import HTTPAdapter
+import zstandard
 from diskcache import Cache
 from tenacity import (
     retry,
     stop_after_attempt,
-    wait_exponential,
     retry_if_exception_type
 )
 import colorlog
@@ -75,8 +86,12 @@ logger = setup_logger("convexia_crm")
 # Caching
 # ============================================
 
-# Initialize cache
-cache = Cache(str(config.cache_dir)) if config.enable_cache else None
+# Initialize cache (persists across runs; least-recently-stored entries are
+# evicted once the directory exceeds the size limit)
+cache = Cache(
+    str(config.cache_dir),
+    size_limit=config.cache_size_limit_mb * 1024 * 1024
+) if config.enable_cache else None
 
 
 def cache_key(*args, **kwargs) -> str:
@@ -85,6 +100,29 @@ def cache_key(*args, **kwargs) -> str:
     return hashlib.sha256(key_data.encode()).hexdigest()
 
 
+_zstd_local = threading.local()
+
+
+def _zstd_contexts():
+    """Per-thread zstd (de)compressors; zstandard contexts are not thread-safe"""
+    if not hasattr(_zstd_local, "compressor"):
+        _zstd_local.compressor = zstandard.ZstdCompressor(level=3)
+        _zstd_local.decompressor = zstandard.ZstdDecompressor()
+    return _zstd_local.compressor, _zstd_local.decompressor
+
+
+def _encode_cached(value: Any) -> bytes:
+    """Pickle and zstd-compress a value for the disk cache"""
+    compressor, _ = _zstd_contexts()
+    return compressor.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _decode_cached(raw: bytes) -> Any:
+    """Inverse of _encode_cached"""
+    _, decompressor = _zstd_contexts()
+    return pickle.loads(decompressor.decompress(raw))
+
+
 def cached(expire: Optional[int] = None):
     """
     Decorator to cache function results
@@ -93,33 +131,92 @@ def cached(expire: Optional[int] = None):
         expire: Cache expiry in seconds (None = use config default)
     """
     def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             if not config.enable_cache or cache is None:
                 return func(*args, **kwargs)
             
-            # Generate cache key
-            key = f"{func.__module__}.{func.__name__}:{cache_key(*args, **kwargs)}"
+            # Bind to the signature so positional, keyword and defaulted
+            # calls with the same values share one cache entry. For methods,
+            # the qualified name identifies the class and `self` is skipped.
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            arguments.pop("self", None)
+            key = f"{func.__module__}.{func.__qualname__}:{cache_key(**arguments)}"
             
             # Check cache
-            result = cache.get(key)
-            if result is not None:
-                logger.debug(f"Cache hit for {func.__name__}")
-                return result
+            raw = cache.get(key)
+            if raw is not None:
+                try:
+                    result = _decode_cached(raw)
+                    logger.debug(f"Cache hit for {func.__name__}")
+                    return result
+                except Exception as e:
+                    # Entries written before compression, or by an older model
+                    # version, are treated as misses and overwritten
+                    logger.debug(f"Discarding unreadable cache entry for {func.__name__}: {e}")
             
-            # Call function and cache result
-            logger.debug(f"Cache miss for {func.__name__}")
-            result = func(*args, **kwargs)
+            def compute() -> bytes:
+                # Call function and cache result
+                logger.debug(f"Cache miss for {func.__name__}")
+                raw = _encode_cached(func(*args, **kwargs))
+                
+                # Calculate expiry
+                expiry = expire if expire is not None else config.cache_expiry_hours * 3600
+                cache.set(key, raw, expire=expiry)
+                return raw
             
-            # Calculate expiry
-            expiry = expire if expire is not None else config.cache_expiry_hours * 3600
-            cache.set(key, result, expire=expiry)
-            
-            return result
+            # Concurrent misses for the same key share one call; every caller
+            # decodes its own copy, just like a cache hit
+            return _decode_cached(_inflight.do(key, compute))
         return wrapper
     return decorator
 
 
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into a single execution
+    
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and receive the same result (or exception).
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+    
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn for key, or wait on the call already in flight for it"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+# In-flight cache misses, shared by all @cached functions
+_inflight = SingleFlight()
+
+
 def clear_cache():
     """Clear all cached data"""
     if cache:
@@ -133,20 +230,41 @@ def clear_cache():
 
 def retry_with_backoff(
     max_attempts: Optional[int] = None,
-    exceptions: tuple = (Exception,)
+    exceptions: tuple = (Exception,),
+    initial_backoff: float = 0.5,
+    max_backoff: float = 60.0,
+    multiplier: float = 2.0,
+    jitter: float = 0.5
 ):
     """
-    Decorator for retrying functions with exponential backoff
+    Decorator for retrying functions with jittered exponential backoff
+    
+    HTTP 429 responses that carry a Retry-After header wait exactly that
+    long (capped at max_backoff); other failures wait
+    min(max_backoff, initial_backoff * multiplier**attempt), scaled by a
+    random factor in [1 - jitter, 1 + jitter] so concurrent callers spread out.
     
     Args:
         max_attempts: Maximum retry attempts (None = use config default)
         exceptions: Tuple of exceptions to retry on
+        initial_backoff: Delay before the first retry, in seconds
+        max_backoff: Upper bound on any single delay, in seconds
+        multiplier: Growth factor between attempts
+        jitter: Relative random spread applied to the delay
     """
     max_attempts = max_attempts or config.max_retries
     
+    def wait(retry_state) -> float:
+        retry_after = _retry_after_seconds(retry_state.outcome.exception())
+        if retry_after is not None:
+            return min(max_backoff, retry_after)
+        
+        delay = min(max_backoff, initial_backoff * multiplier ** (retry_state.attempt_number - 1))
+        return delay * random.uniform(1 - jitter, 1 + jitter)
+    
     return retry(
         stop=stop_after_attempt(max_attempts),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=wait,
         retry=retry_if_exception_type(exceptions),
         before_sleep=lambda retry_state: logger.warning(
             f"Retrying {retry_state.fn.__name__} after failure "
@@ -155,31 +273,205 @@ def retry_with_backoff(
     )
 
 
+def _retry_after_seconds(exc: Optional[BaseException]) -> Optional[float]:
+    """Seconds to wait from a 429 response's Retry-After header, if present"""
+    response = getattr(exc, "response", None)
+    if response is None or getattr(response, "status_code", None) != 429:
+        return None
+    
+    header = response.headers.get("Retry-After")
+    if not header:
+        return None
+    
+    try:
+        return max(0.0, float(header))
+    except ValueError:
+        pass
+    
+    # Retry-After may also be an HTTP date
+    try:
+        retry_at = parsedate_to_datetime(header)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
 # ============================================
 # Rate Limiting
 # ============================================
 
 class RateLimiter:
-    """Simple rate limiter for API calls"""
+    """
+    Rate limiter for API calls (thread-safe)
+    
+    Callers reserve the next free slot under a lock and sleep outside it,
+    so concurrent threads are paced at calls_per_minute without queueing
+    on the lock.
+    """
     
     def __init__(self, calls_per_minute: int):
         self.calls_per_minute = calls_per_minute
         self.interval = 60.0 / calls_per_minute
-        self.last_call = 0
+        self._next_slot = 0.0  # Theoretical arrival time of the next call
+        self._lock = threading.Lock()
     
     def wait(self):
         """Wait if necessary to respect rate limit"""
-        elapsed = time.time() - self.last_call
-        if elapsed < self.interval:
-            sleep_time = self.interval - elapsed
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+            sleep_time = slot - now
+        
+        if sleep_time > 0:
             logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f}s")
             time.sleep(sleep_time)
-        self.last_call = time.time()
+    
+    def pause(self, seconds: float):
+        """Hold back every call until `seconds` from now"""
+        with self._lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+    
+    def update_from_headers(
+        self,
+        headers: Dict[str, str],
+        min_remaining: int = 10,
+        max_pause: float = 60.0
+    ):
+        """
+        Pause when a provider reports its quota is nearly drained
+        
+        Reads X-RateLimit-Remaining / X-RateLimit-Reset (epoch seconds or
+        seconds until reset) and holds calls until the window resets.
+        
+        Args:
+            headers: Response headers
+            min_remaining: Pause once fewer calls than this remain
+            max_pause: Upper bound on the pause, in seconds
+        """
+        try:
+            remaining = int(headers.get("X-RateLimit-Remaining", -1))
+            reset = float(headers.get("X-RateLimit-Reset", 0))
+        except (TypeError, ValueError):
+            return
+        
+        if remaining < 0 or remaining >= min_remaining or reset <= 0:
+            return
+        
+        # Large values are absolute epoch timestamps, small ones are deltas
+        delay = reset - time.time() if reset > 1e9 else reset
+        if delay <= 0:
+            return
+        if delay > max_pause:
+            logger.warning(f"Rate limit resets in {delay:.0f}s, pausing for {max_pause:.0f}s")
+            delay = max_pause
+        
+        logger.info(f"Only {remaining} calls left in rate limit window, pausing for {delay:.1f}s")
+        self.pause(delay)
 
 
 # Global rate limiter
 rate_limiter = RateLimiter(config.rate_limit_rpm)
 
+# Per-host rate limiters, so each API's quota gets its own bucket
+_host_rate_limiters: Dict[str, RateLimiter] = {}
+_host_rate_limiters_lock = threading.Lock()
+
+
+def rate_limiter_for(url: str) -> RateLimiter:
+    """
+    Get the rate limiter for the host of `url`
+    
+    Hosts listed in config.provider_rate_limits use that RPM; others
+    fall back to config.rate_limit_rpm.
+    """
+    host = (urlparse(url).hostname or "").lower()
+    with _host_rate_limiters_lock:
+        limiter = _host_rate_limiters.get(host)
+        if limiter is None:
+            rpm = config.provider_rate_limits.get(host, config.rate_limit_rpm)
+            limiter = _host_rate_limiters[host] = RateLimiter(rpm)
+        return limiter
+
+
+# ============================================
+# HTTP
+# ============================================
+
+def create_http_session(pool_size: int = 32) -> requests.Session:
+    """
+    Create a requests Session with a pooled keep-alive adapter
+    
+    Reusing one session avoids a new TCP+TLS handshake on every request.
+    
+    Args:
+        pool_size: Max connections kept open per host
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=0  # Retries are handled by retry_with_backoff
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "User-Agent": "convexia-crm/1.0",
+    })
+    return session
+
+
+# Global HTTP session shared by all API clients for the process lifetime
+http_session = create_http_session()
+atexit.register(http_session.close)
+
+
+# ============================================
+# Concurrency
+# ============================================
+
+def map_concurrently(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: Optional[int] = None,
+    default_factory: Optional[Callable[[], Any]] = None,
+    task: str = "Task",
+    describe: Callable[[Any], str] = str
+) -> List[Any]:
+    """
+    Apply fn to every item on a thread pool, preserving input order
+    
+    Meant for network-bound calls. An item whose call raises is logged
+    and replaced by default_factory() (None if not given), so one failure
+    does not sink the batch.
+    
+    Args:
+        fn: Function called with each item
+        items: Items to process
+        max_workers: Max concurrent calls (None = use config default)
+        default_factory: Builds the result for a failed item
+        task: What fn does, for the failure log message
+        describe: Renders an item for the failure log message
+    
+    Returns:
+        One result per item, in input order
+    """
+    items = list(items)
+    if not items:
+        return []
+    
+    def _call(item):
+        try:
+            return fn(item)
+        except Exception as e:
+            logger.warning(f"{task} failed for {describe(item)[:60]}: {e}")
+            return default_factory() if default_factory else None
+    
+    max_workers = min(len(items), max_workers or config.max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_call, items))
+
 
 # ============================================
 # JSON Utilities
@@ -278,10 +570,74 @@ def load_json(filepath: Path) -> Any:
         return json.load(f)
 
 
+def save_csv(df, filepath: Path) -> Path:
+    """
+    Save a DataFrame as CSV using Arrow's native writer when available
+    
+    Falls back to pandas' writer if pyarrow is missing or the frame
+    contains columns Arrow cannot convert.
+    
+    Args:
+        df: pandas DataFrame to save
+        filepath: Destination CSV path
+    
+    Returns:
+        Path to saved file
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pacsv
+        
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pacsv.write_csv(
+            table,
+            str(filepath),
+            write_options=pacsv.WriteOptions(quoting_style="needed")
+        )
+    except ImportError:
+        df.to_csv(filepath, index=False)
+    except Exception as e:
+        logger.debug(f"Arrow CSV writer failed, using pandas: {e}")
+        df.to_csv(filepath, index=False)
+    
+    logger.info(f"Saved CSV to {filepath}")
+    return filepath
+
+
+def save_parquet(df, filepath: Path) -> Optional[Path]:
+    """
+    Save a DataFrame as zstd-compressed Parquet
+    
+    Args:
+        df: pandas DataFrame to save
+        filepath: Destination Parquet path
+    
+    Returns:
+        Path to saved file, or None if pyarrow is not installed or the
+        frame contains columns Arrow cannot convert
+    """
+    try:
+        df.to_parquet(filepath, engine="pyarrow", compression="zstd", index=False)
+    except ImportError:
+        logger.warning("pyarrow not installed, skipping Parquet export")
+        return None
+    except Exception as e:
+        logger.warning(f"Could not write Parquet to {filepath}, skipping: {e}")
+        return None
+    
+    logger.info(f"Saved Parquet to {filepath}")
+    return filepath
+
+
 # ============================================
 # Data Deduplication
 # ============================================
 
+def company_key(company_name: Optional[str]) -> str:
+    """Normalized key used to deduplicate companies by name"""
+    return (company_name or "").strip().lower()
+
+
 def deduplicate_companies(companies: list) -> list:
     """
     Deduplicate companies by name (case-insensitive)
@@ -296,7 +652,7 @@ def deduplicate_companies(companies: list) -> list:
     deduped = []
     
     for company in companies:
-        name = (company.get("company_name") or "").strip().lower()
+        name = company_key(company.get("company_name"))
         if not name or name in seen:
             continue
         seen.add(name)
@@ -306,6 +662,34 @@ def deduplicate_companies(companies: list) -> list:
     return deduped
 
 
+def deduplicate_queries(queries: list) -> list:
+    """
+    Drop search queries that are duplicates up to case and whitespace,
+    keeping the first occurrence. Blank and non-string items are skipped.
+    
+    Args:
+        queries: List of query strings
+    
+    Returns:
+        Deduplicated list
+    """
+    seen = set()
+    deduped = []
+    
+    for query in queries:
+        if not isinstance(query, str):
+            continue
+        key = " ".join(query.lower().split())
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        deduped.append(query)
+    
+    if len(deduped) < len(queries):
+        logger.info(f"Deduplicated {len(queries)} -> {len(deduped)} queries")
+    return deduped
+
+
 # ============================================
 # Timestamp Utilities
 # ============================================
@@ -329,31 +713,35 @@ def is_valid_nct_id(nct_id: str) -> bool:
     return bool(nct_id and nct_id.startswith("NCT") and len(nct_id) >= 11)
 
 
+# Canonical phase values returned by normalize_phase
+PHASE_1 = "phase 1"
+PHASE_2 = "phase 2"
+PHASE_3 = "phase 3"
+PHASE_4 = "phase 4"
+
+_PHASE_RE = re.compile(r"phase[\s_]*(?:([1-4])|(iv|iii|ii|i)(?![a-z]))")
+_PHASE_NUMERALS = {
+    "1": PHASE_1, "i": PHASE_1,
+    "2": PHASE_2, "ii": PHASE_2,
+    "3": PHASE_3, "iii": PHASE_3,
+    "4": PHASE_4, "iv": PHASE_4,
+}
+
+
 def normalize_phase(phase: str) -> str:
-    """Normalize clinical trial phase string"""
+    """
+    Normalize clinical trial phase string
+    
+    Maps variants like "PHASE2", "Phase II" and "early_phase1" to the
+    PHASE_* constants; unrecognized values are returned lowercased.
+    """
     if not phase:
         return "unknown"
     
     phase = phase.lower().strip()
     
-    # Map variations to standard format
-    phase_map = {
-        "phase1": "phase 1",
-        "phase 1": "phase 1",
-        "phase i": "phase 1",
-        "phase2": "phase 2",
-        "phase 2": "phase 2",
-        "phase ii": "phase 2",
-        "phase3": "phase 3",
-        "phase 3": "phase 3",
-        "phase iii": "phase 3",
-        "phase4": "phase 4",
-        "phase 4": "phase 4",
-        "phase iv": "phase 4",
-    }
-    
-    for key, value in phase_map.items():
-        if key in phase:
-            return value
+    match = _PHASE_RE.search(phase)
+    if match:
+        return _PHASE_NUMERALS[match.group(1) or match.group(2)]
     
     return phase
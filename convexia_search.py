@@ -8,7 +8,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from agent import ConvexiaCRMAgent
-from config.utils import deduplicate_companies, logger
+from config.utils import deduplicate_companies, deduplicate_queries, logger
 from config.settings import config
 from config.llm_client import LLMClient
 import pandas as pd
@@ -91,7 +91,7 @@ def run_interactive_search():
     
     # Generate queries
     print("\n📝 Generating targeted search queries...")
-    queries = generate_search_queries(user_input, llm)
+    queries = deduplicate_queries(generate_search_queries(user_input, llm))
     
     print("\nQueries to run:")
     for i, q in enumerate(queries, 1):
@@ -180,15 +180,15 @@ def run_interactive_search():
             print(f"TOP {num_to_show} PERSONALIZED EMAILS")
             print(f"{'─'*80}")
             
-            for idx, row in emails_df.head(num_to_show).iterrows():
+            for row in emails_df.head(num_to_show).itertuples(index=False):
                 print(f"\n{'─'*80}")
-                print(f"To: {row['contact_name']}")
-                if row.get('contact_role'):
-                    print(f"Role: {row['contact_role']}")
-                print(f"Company: {row['company_name']}")
-                print(f"Subject: {row['subject']}")
+                print(f"To: {row.contact_name}")
+                if row.contact_role:
+                    print(f"Role: {row.contact_role}")
+                print(f"Company: {row.company_name}")
+                print(f"Subject: {row.subject}")
                 print(f"{'─'*80}")
-                print(row['body'])
+                print(row.body)
     
     # Export
     print("\n" + "="*80)
@@ -3,18 +3,28 @@ Example usage of the Convexia CRM Agent
 Demonstrates the refactored, production-ready implementation
 """
 
+import io
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import List
 
 # Add project root to path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
+from pydantic import TypeAdapter
+
 from agent import ConvexiaCRMAgent
-from config.utils import logger, deduplicate_companies
+from config.models import Company
+from config.utils import logger, company_key, save_csv, save_parquet
 from config.settings import config
 import pandas as pd
 
+# Built once so list serialization reuses a single compiled serializer
+_COMPANY_LIST_ADAPTER = TypeAdapter(List[Company])
+
 
 def example_single_query():
     """Example: Run a single query"""
@@ -30,7 +40,11 @@ def example_single_query():
     companies, companies_df, dms_df, _ = agent.run_query_with_outputs(query)
     
     print(f"\n✅ Found {len(companies)} companies:")
-    print(companies_df[['company_name', 'fit_score', 'num_phase2_failed']].to_string())
+    # Bound formatter work and write straight to stdout (no intermediate string)
+    companies_df[['company_name', 'fit_score', 'num_phase2_failed']].to_string(
+        buf=sys.stdout, max_rows=20, max_colwidth=40
+    )
+    print()
     
     print(f"\n✅ Found {len(dms_df)} decision makers")
     
@@ -51,18 +65,28 @@ def example_multiple_queries():
         "small biotech companies with suspended phase 2 cancer trials"
     ]
     
-    all_companies = []
+    # Deduplicate as results arrive so repeats are never serialized
+    seen = set()
+    deduped = []
+    total = 0
     
     for query in queries:
         print(f"\n📋 Query: {query}")
         companies = agent.run_query(query)
         print(f"   → Found {len(companies)} companies")
-        all_companies.extend([c.dict() for c in companies])
-    
-    # Deduplicate
-    deduped = deduplicate_companies(all_companies)
-    
-    print(f"\n✅ Total: {len(all_companies)} → {len(deduped)} after deduplication")
+        total += len(companies)
+        new_companies = []
+        for c in companies:
+            key = company_key(c.company_name)
+            if key in seen:
+                continue
+            seen.add(key)
+            new_companies.append(c)
+        deduped.extend(
+            _COMPANY_LIST_ADAPTER.dump_python(new_companies, mode="json")
+        )
+    
+    print(f"\n✅ Total: {total} → {len(deduped)} after deduplication")
     print("\nCompany Names:")
     for c in deduped:
         print(f"  - {c['company_name']}")
@@ -119,8 +143,8 @@ def example_export_to_csv():
     companies_csv = output_dir / "companies.csv"
     dms_csv = output_dir / "decision_makers.csv"
     
-    companies_df.to_csv(companies_csv, index=False)
-    dms_df.to_csv(dms_csv, index=False)
+    save_csv(companies_df, companies_csv)
+    save_csv(dms_df, dms_csv)
     
     print(f"✅ Exported to:")
     print(f"   - {companies_csv}")
@@ -128,8 +152,13 @@ def example_export_to_csv():
     
     if emails_df is not None:
         emails_csv = output_dir / "emails.csv"
-        emails_df.to_csv(emails_csv, index=False)
+        save_csv(emails_df, emails_csv)
         print(f"   - {emails_csv}")
+        
+        # Email bodies are long text; Parquet is far smaller and faster to reload
+        emails_parquet = save_parquet(emails_df, output_dir / "emails.parquet")
+        if emails_parquet:
+            print(f"   - {emails_parquet}")
 
 
 def example_custom_config():
@@ -166,6 +195,35 @@ def example_custom_config():
     print(f"✅ Found {len(companies)} companies with custom config")
 
 
+class _ThreadOutput(io.TextIOBase):
+    """stdout proxy that sends print() from worker threads to per-thread buffers"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer or self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+
+
+def _run_buffered(fn, output: _ThreadOutput):
+    """Run an example, returning its captured output and any error"""
+    buffer = io.StringIO()
+    output.local.buffer = buffer
+    try:
+        fn()
+        return buffer.getvalue(), None
+    except Exception as e:
+        logger.error(f"Example {fn.__name__} failed: {e}", exc_info=True)
+        return buffer.getvalue(), e
+    finally:
+        output.local.buffer = None
+
+
 def main():
     """Run all examples"""
     print("\n" + "="*80)
@@ -178,27 +236,48 @@ def main():
     print(f"  Cache Enabled: {config.enable_cache}")
     print(f"  Output Dir: {config.output_dir}")
     
-    try:
-        # Run examples
-        # Uncomment the examples you want to run:
-        
-        companies = example_single_query()
-        
-        # deduped = example_multiple_queries()
-        
-        # companies, emails = example_with_emails()
-        
-        # example_export_to_csv()
-        
-        # example_custom_config()
-        
+    # Add or remove the examples you want to run:
+    examples = [
+        example_single_query,
+        # example_multiple_queries,
+        # example_with_emails,
+        # example_export_to_csv,
+        # example_custom_config,
+    ]
+    
+    errors = []
+    if len(examples) > 1:
+        # Examples are network-bound and each builds its own agent, so run them
+        # side by side. Output is buffered per example and printed as each finishes.
+        stdout = sys.stdout
+        output = _ThreadOutput(stdout)
+        sys.stdout = output
+        try:
+            with ThreadPoolExecutor(max_workers=len(examples)) as executor:
+                futures = [executor.submit(_run_buffered, fn, output) for fn in examples]
+                for future in as_completed(futures):
+                    text, error = future.result()
+                    stdout.write(text)
+                    if error:
+                        errors.append(error)
+        finally:
+            sys.stdout = stdout
+    else:
+        # A single example runs inline so its progress prints appear live
+        for fn in examples:
+            try:
+                fn()
+            except Exception as e:
+                logger.error(f"Example {fn.__name__} failed: {e}", exc_info=True)
+                errors.append(e)
+    
+    if not errors:
         print("\n" + "="*80)
         print("✅ ALL EXAMPLES COMPLETED")
         print("="*80 + "\n")
-        
-    except Exception as e:
-        logger.error(f"Example failed: {e}", exc_info=True)
-        print(f"\n❌ Error: {e}")
+    else:
+        for e in errors:
+            print(f"\n❌ Error: {e}")
         print("\nPlease ensure you have:")
         print("  1. Created .env file from .env.example")
         print("  2. Added your API keys")
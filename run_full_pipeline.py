@@ -3,11 +3,18 @@ Full Convexia CRM Pipeline - Maximum Companies + Emails
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from agent import ConvexiaCRMAgent
-from config.utils import deduplicate_companies, logger
+from config.utils import (
+    company_key,
+    deduplicate_queries,
+    map_concurrently,
+    save_csv,
+    save_parquet
+)
 from config.settings import config
 import pandas as pd
 
@@ -28,37 +35,39 @@ def run_full_pipeline():
         "oncology biotech terminated checkpoint inhibitor trials",
         "US biotech companies discontinued oncology programs",
     ]
+    queries = deduplicate_queries(queries)
     
-    all_companies = []
+    # Queries are network-bound, so run them concurrently; max_workers caps
+    # the number of pipelines hitting the LLM/search/trials APIs at once.
+    # A failed query comes back as None (the error is logged).
+    print(f"\n📋 Running {len(queries)} queries (up to {config.max_workers} at a time)...")
+    results = map_concurrently(agent.run_query, queries, task="Query")
     
-    for i, query in enumerate(queries, 1):
+    # Deduplicate as results are merged, keeping the validated Company objects
+    seen = set()
+    company_objects = []
+    total = 0
+    
+    for i, (query, companies) in enumerate(zip(queries, results), 1):
         print(f"\n📋 Query {i}/{len(queries)}: {query[:60]}...")
-        try:
-            companies = agent.run_query(query)
-            print(f"   ✅ Found {len(companies)} companies")
-            all_companies.extend([c.dict() for c in companies])
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
+        if companies is None:
+            print("   ❌ Error: query failed (see log for details)")
             continue
-    
-    # Deduplicate
-    print(f"\n🔄 Deduplicating...")
-    unique_companies = deduplicate_companies(all_companies)
-    print(f"   Total: {len(all_companies)} → {len(unique_companies)} unique companies")
-    
-    if not unique_companies:
+        print(f"   ✅ Found {len(companies)} companies")
+        total += len(companies)
+        for c in companies:
+            key = company_key(c.company_name)
+            if key in seen:
+                continue
+            seen.add(key)
+            company_objects.append(c)
+    
+    print(f"\n🔄 Deduplicated: {total} → {len(company_objects)} unique companies")
+    
+    if not company_objects:
         print("\n❌ No companies found. Check your API keys and queries.")
         return
     
-    # Convert back to Company objects for email generation
-    from config.models import Company
-    company_objects = []
-    for c in unique_companies:
-        try:
-            company_objects.append(Company(**c))
-        except Exception as e:
-            logger.warning(f"Could not create Company object: {e}")
-    
     # Sort by fit score (highest first)
     company_objects.sort(key=lambda x: x.fit_score_for_convexia, reverse=True)
     
@@ -87,12 +96,19 @@ def run_full_pipeline():
     print(f"\n🏢 Companies Found: {len(companies_df)}")
     if not companies_df.empty:
         print("\nTop Companies by Fit Score:")
-        print(companies_df[['company_name', 'fit_score', 'therapeutic_areas', 'num_decision_makers']].to_string())
+        # therapeutic_areas can be a long list, so cap column width
+        companies_df[['company_name', 'fit_score', 'therapeutic_areas', 'num_decision_makers']].head(20).to_string(
+            buf=sys.stdout, max_colwidth=40
+        )
+        print()
     
     print(f"\n👥 Decision Makers Found: {len(dms_df)}")
     if not dms_df.empty and len(dms_df) > 0:
         print("\nSample Decision Makers:")
-        print(dms_df[['company_name', 'name', 'role']].head(10).to_string())
+        dms_df[['company_name', 'name', 'role']].head(10).to_string(
+            buf=sys.stdout, max_colwidth=40
+        )
+        print()
     
     print(f"\n✉️  Emails Generated: {len(emails_df) if emails_df is not None else 0}")
     
@@ -102,13 +118,13 @@ def run_full_pipeline():
         print("📧 SAMPLE PERSONALIZED EMAILS")
         print("="*80)
         
-        for idx, row in emails_df.head(3).iterrows():
+        for row in emails_df.head(3).itertuples(index=False):
             print(f"\n{'─'*80}")
-            print(f"To: {row['contact_name']} ({row['contact_role']})")
-            print(f"Company: {row['company_name']}")
-            print(f"Subject: {row['subject']}")
+            print(f"To: {row.contact_name} ({row.contact_role})")
+            print(f"Company: {row.company_name}")
+            print(f"Subject: {row.subject}")
             print(f"{'─'*80}")
-            print(row['body'])
+            print(row.body)
             print()
     
     # Export to CSV
@@ -118,10 +134,19 @@ def run_full_pipeline():
     dms_csv = output_dir / "all_decision_makers.csv"
     emails_csv = output_dir / "all_emails.csv"
     
-    companies_df.to_csv(companies_csv, index=False)
-    dms_df.to_csv(dms_csv, index=False)
+    exports = [(companies_df, companies_csv), (dms_df, dms_csv)]
     if emails_df is not None:
-        emails_df.to_csv(emails_csv, index=False)
+        exports.append((emails_df, emails_csv))
+    
+    def _export(export):
+        df, csv_path = export
+        save_csv(df, csv_path)
+        # Columnar copy for fast reloads in downstream analysis
+        return save_parquet(df, csv_path.with_suffix(".parquet"))
+    
+    # Arrow's writers release the GIL, so the files are written in parallel
+    with ThreadPoolExecutor(max_workers=len(exports)) as executor:
+        parquet_paths = [p for p in executor.map(_export, exports) if p]
     
     print("\n" + "="*80)
     print("💾 EXPORTED FILES")
@@ -129,9 +154,11 @@ def run_full_pipeline():
     print(f"\n✅ Companies: {companies_csv}")
     print(f"✅ Decision Makers: {dms_csv}")
     print(f"✅ Emails: {emails_csv}")
+    for parquet_path in parquet_paths:
+        print(f"✅ Parquet: {parquet_path}")
     
     # Also save full JSON
-    import json
+    import orjson
     full_data = {
         "companies": [c.dict() for c in company_objects],
         "total_companies": len(company_objects),
@@ -140,8 +167,8 @@ def run_full_pipeline():
     }
     
     full_json = output_dir / "full_pipeline_results.json"
-    with open(full_json, 'w') as f:
-        json.dump(full_data, f, indent=2, default=str)
+    with open(full_json, 'wb') as f:
+        f.write(orjson.dumps(full_data, option=orjson.OPT_INDENT_2, default=str))
     print(f"✅ Full JSON: {full_json}")
     
     print("\n" + "="*80)
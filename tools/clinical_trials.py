@@ -3,17 +3,27 @@ Clinical Trials data fetcher using ClinicalTrials.gov API v2
 Completely FREE - no API key required
 """
 
+import re
+import orjson
 import requests
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime
 
 from config.settings import config
 from config.models import ClinicalTrial
-from config.utils import logger, retry_with_backoff, cached, normalize_phase, is_valid_nct_id
+from config.utils import (
+    logger,
+    retry_with_backoff,
+    cached,
+    normalize_phase,
+    is_valid_nct_id,
+    PHASE_2,
+    PHASE_3,
+    http_session,
+    map_concurrently
+)
 
 
-@retry_with_backoff(exceptions=(requests.RequestException,))
-@cached(expire=86400)  # Cache for 24 hours
 def fetch_clinical_trials_for_query(
     query: str,
     max_records: int = 50,
@@ -30,6 +40,33 @@ def fetch_clinical_trials_for_query(
     Returns:
         List of trial dicts with structured data
     """
+    # Canonicalize so equivalent requests share a cache entry
+    return _fetch_clinical_trials(
+        " ".join(query.split()),
+        max_records,
+        _canonical_filters(filters)
+    )
+
+
+def _canonical_filters(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Sort comma-separated filter values (e.g. statuses) into a stable order"""
+    if not filters:
+        return None
+    return {
+        key: ",".join(sorted(v.strip().upper() for v in value.split(",")))
+        if isinstance(value, str) else value
+        for key, value in filters.items()
+    }
+
+
+@retry_with_backoff(exceptions=(requests.RequestException,))
+@cached(expire=86400)  # Cache for 24 hours
+def _fetch_clinical_trials(
+    query: str,
+    max_records: int,
+    filters: Optional[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Fetch and parse trials for an already-canonicalized request"""
     
     # Build query parameters
     params = {
@@ -47,24 +84,18 @@ def fetch_clinical_trials_for_query(
     
     try:
         logger.info(f"Fetching clinical trials for query: {query[:50]}...")
-        response = requests.get(
-            config.ctgov_base_url,
-            params=params,
-            timeout=60
-        )
-        response.raise_for_status()
-        data = response.json()
-        
-        studies = data.get("studies", [])
-        logger.info(f"Retrieved {len(studies)} clinical trials")
         
+        # Parse as pages stream in and stop once we have enough
         trials = []
-        for study in studies:
+        for study in _iter_studies(params):
             trial_data = _parse_study(study)
             if trial_data:
                 trials.append(trial_data)
+                if len(trials) >= max_records:
+                    break
         
-        return trials[:max_records]
+        logger.info(f"Retrieved {len(trials)} clinical trials")
+        return trials
         
     except requests.RequestException as e:
         logger.error(f"ClinicalTrials.gov API error: {e}")
@@ -74,6 +105,31 @@ def fetch_clinical_trials_for_query(
         return []
 
 
+def _iter_studies(params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield raw studies from ClinicalTrials.gov, following nextPageToken
+    
+    Pages are requested lazily, so a consumer that stops early never
+    fetches the remaining pages.
+    """
+    page_params = dict(params)
+    while True:
+        response = http_session.get(
+            config.ctgov_base_url,
+            params=page_params,
+            timeout=60
+        )
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        
+        yield from data.get("studies", [])
+        
+        token = data.get("nextPageToken")
+        if not token:
+            return
+        page_params["pageToken"] = token
+
+
 def _parse_study(study: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
     Parse a single study from ClinicalTrials.gov API v2
@@ -87,16 +143,17 @@ def _parse_study(study: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     try:
         protocol = study.get("protocolSection", {})
         identification = protocol.get("identificationModule", {})
-        status = protocol.get("statusModule", {})
-        conditions = protocol.get("conditionsModule", {})
-        arms_interventions = protocol.get("armsInterventionsModule", {})
-        sponsor = protocol.get("sponsorCollaboratorsModule", {})
         
-        # Extract NCT ID
+        # Extract NCT ID first so invalid studies skip the rest of the parse
         nct_id = identification.get("nctId", "")
         if not is_valid_nct_id(nct_id):
             return None
         
+        status = protocol.get("statusModule", {})
+        conditions = protocol.get("conditionsModule", {})
+        arms_interventions = protocol.get("armsInterventionsModule", {})
+        sponsor = protocol.get("sponsorCollaboratorsModule", {})
+        
         # Extract basic info
         title = identification.get("briefTitle", "")
         overall_status = status.get("overallStatus", "Unknown")
@@ -112,12 +169,11 @@ def _parse_study(study: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         condition_str = ", ".join(condition_list) if condition_list else None
         
         # Extract interventions
-        interventions = arms_interventions.get("interventions", [])
-        intervention_names = []
-        for intervention in interventions:
-            name = intervention.get("name")
-            if name:
-                intervention_names.append(name)
+        intervention_names = [
+            intervention["name"]
+            for intervention in arms_interventions.get("interventions", [])
+            if intervention.get("name")
+        ]
         intervention_str = ", ".join(intervention_names) if intervention_names else None
         
         # Extract sponsor
@@ -128,10 +184,7 @@ def _parse_study(study: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         why_stopped = status.get("whyStopped")
         
         # Extract completion date
-        completion_date = None
-        if "completionDateStruct" in status:
-            date_struct = status["completionDateStruct"]
-            completion_date = date_struct.get("date")
+        completion_date = status.get("completionDateStruct", {}).get("date")
         
         return {
             "nct_id": nct_id,
@@ -151,6 +204,19 @@ def _parse_study(study: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return None
 
 
+# Status filter for failed/terminated trials
+FAILED_STATUS_FILTERS = {"status": "TERMINATED,SUSPENDED,WITHDRAWN"}
+
+# Sponsors OR-ed into a single ClinicalTrials.gov request
+SPONSOR_BATCH_SIZE = 20
+
+# Result bucket for each canonical phase we report failures for
+_FAILED_PHASE_BUCKETS = {
+    PHASE_2: "phase_2_failed",
+    PHASE_3: "phase_3_failed",
+}
+
+
 def fetch_failed_trials_for_company(
     company_name: str,
     phases: Optional[List[str]] = None,
@@ -170,26 +236,145 @@ def fetch_failed_trials_for_company(
     if phases is None:
         phases = ["Phase 2", "Phase 3"]
     
-    result = {
-        "phase_2_failed": [],
-        "phase_3_failed": [],
-    }
-    
-    # Fetch terminated/suspended trials
-    filters = {
-        "status": "TERMINATED,SUSPENDED,WITHDRAWN"
-    }
-    
     # Search by company name
     trials = fetch_clinical_trials_for_query(
         query=company_name,
         max_records=max_records * 2,  # Fetch more since we'll filter
-        filters=filters
+        filters=FAILED_STATUS_FILTERS
     )
     
-    # Categorize by phase
+    result = _categorize_failed_trials(trials)
+    
+    logger.info(
+        f"Found {len(result['phase_2_failed'])} Phase 2 and "
+        f"{len(result['phase_3_failed'])} Phase 3 failed trials for {company_name}"
+    )
+    
+    return result
+
+
+def fetch_failed_trials_for_companies(
+    company_names: List[str],
+    phases: Optional[List[str]] = None,
+    max_records: int = 50,
+    max_workers: Optional[int] = None,
+    batch_size: int = SPONSOR_BATCH_SIZE
+) -> Dict[str, Dict[str, List[ClinicalTrial]]]:
+    """
+    Fetch failed/terminated trials for many companies
+    
+    Companies are looked up in batches: each batch is a single request
+    OR-ing a LeadSponsorName clause per company, and the returned trials
+    are routed back to the company named in their lead sponsor. Batches
+    are dispatched concurrently on the module's keep-alive session. When
+    a batch hits its result cap, companies left short are re-fetched on
+    their own so a large sponsor cannot crowd them out.
+    
+    Args:
+        company_names: Names of the companies/sponsors
+        phases: List of phases to filter (e.g., ["Phase 2", "Phase 3"])
+        max_records: Maximum number of records per phase
+        max_workers: Max concurrent requests (None = use config default)
+        batch_size: Companies per request
+    
+    Returns:
+        Dict mapping company name to its phase_2_failed/phase_3_failed lists
+    """
+    names = [name for name in dict.fromkeys(company_names) if name and name.strip()]
+    if not names:
+        return {}
+    
+    batches = [names[i:i + batch_size] for i in range(0, len(names), batch_size)]
+    per_company = max_records * 2  # Fetch more since we'll filter by phase
+    
+    def _fetch_sponsors(
+        batch: List[str],
+        limit: int
+    ) -> Tuple[Dict[str, List[Dict[str, Any]]], bool]:
+        """Fetch and route trials for `batch`, flagging whether `limit` was hit"""
+        quoted = [name.replace('"', "") for name in batch]
+        expr = " OR ".join(f'AREA[LeadSponsorName]"{name}"' for name in quoted)
+        trials = fetch_clinical_trials_for_query(
+            query=expr,
+            max_records=limit,
+            filters=FAILED_STATUS_FILTERS
+        )
+        return _route_by_sponsor(batch, trials), len(trials) >= limit
+    
+    def _fetch_batch(batch: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        buckets, capped = _fetch_sponsors(batch, per_company * len(batch))
+        if not capped or len(batch) == 1:
+            return buckets
+        
+        # The batch shares one result cap, so a large sponsor can crowd out
+        # the others; look up any company left short on its own
+        for name, found in buckets.items():
+            if len(found) >= per_company:
+                continue
+            try:
+                buckets[name] = _fetch_sponsors([name], per_company)[0][name]
+            except Exception as e:
+                logger.warning(f"Failed trial lookup failed for {name}: {e}")
+        return buckets
+    
+    batch_buckets = map_concurrently(
+        _fetch_batch,
+        batches,
+        max_workers,
+        default_factory=dict,
+        task="Failed trial lookup",
+        describe=lambda batch: f"{len(batch)} sponsors"
+    )
+    
+    results = {}
+    for buckets in batch_buckets:
+        for name, company_trials in buckets.items():
+            results[name] = _categorize_failed_trials(company_trials[:per_company])
+    for name in names:
+        results.setdefault(name, _categorize_failed_trials([]))
+    
+    logger.info(
+        f"Fetched failed trials for {len(names)} companies "
+        f"in {len(batches)} batched requests"
+    )
+    return results
+
+
+def _route_by_sponsor(
+    company_names: List[str],
+    trials: List[Dict[str, Any]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Assign each trial to every company named in its lead sponsor
+    
+    Names match on word boundaries, so "Gen" does not pick up "Amgen Inc".
+    """
+    patterns = [
+        (name, re.compile(rf"(?<!\w){re.escape(name.lower())}(?!\w)"))
+        for name in company_names
+    ]
+    buckets = {name: [] for name in company_names}
+    for trial in trials:
+        sponsor = (trial.get("sponsor") or "").lower()
+        for name, pattern in patterns:
+            if pattern.search(sponsor):
+                buckets[name].append(trial)
+    return buckets
+
+
+def _categorize_failed_trials(
+    trials: List[Dict[str, Any]]
+) -> Dict[str, List[ClinicalTrial]]:
+    """Build ClinicalTrial models and bucket them by phase"""
+    result = {
+        "phase_2_failed": [],
+        "phase_3_failed": [],
+    }
+    
     for trial_data in trials:
-        phase = trial_data.get("phase", "").lower()
+        bucket = _FAILED_PHASE_BUCKETS.get(normalize_phase(trial_data.get("phase")))
+        if bucket is None:
+            continue
         
         # Create ClinicalTrial model
         try:
@@ -204,22 +389,12 @@ def fetch_failed_trials_for_company(
                 why_stopped=trial_data.get("why_stopped"),
                 completion_date=trial_data.get("completion_date")
             )
-            
-            # Categorize
-            if "phase 2" in phase or "phase ii" in phase:
-                result["phase_2_failed"].append(trial)
-            elif "phase 3" in phase or "phase iii" in phase:
-                result["phase_3_failed"].append(trial)
+            result[bucket].append(trial)
                 
         except Exception as e:
             logger.warning(f"Could not create ClinicalTrial model: {e}")
             continue
     
-    logger.info(
-        f"Found {len(result['phase_2_failed'])} Phase 2 and "
-        f"{len(result['phase_3_failed'])} Phase 3 failed trials for {company_name}"
-    )
-    
     return result
 
 
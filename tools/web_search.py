@@ -3,13 +3,48 @@ Web search tools with multiple provider support
 Supports: SerpAPI (FREE tier: 100/month), Serper (Paid)
 """
 
+import asyncio
+import re
+import orjson
 import requests
-from typing import List, Dict, Any, Optional, Literal
+from typing import List, Dict, Any, Iterator, Optional, Literal, Union
 from abc import ABC, abstractmethod
+from itertools import islice
+from operator import attrgetter
 
 from config.settings import config
 from config.models import SearchResult
-from config.utils import logger, retry_with_backoff, cached, rate_limiter
+from config.utils import (
+    logger,
+    retry_with_backoff,
+    cached,
+    rate_limiter_for,
+    http_session,
+    map_concurrently
+)
+
+
+# Roles searched for when looking up decision makers
+DEFAULT_DECISION_MAKER_ROLES = (
+    "CEO", "Chief Executive Officer",
+    "Founder", "Co-founder",
+    "CMO", "Chief Medical Officer",
+    "CSO", "Chief Scientific Officer",
+    "VP Clinical Development",
+    "Head of R&D",
+)
+_DEFAULT_ROLE_QUERY = " OR ".join(f'"{role}"' for role in DEFAULT_DECISION_MAKER_ROLES)
+_DECISION_MAKER_QUERY_TEMPLATE = 'site:linkedin.com/in "{company}" ({role_query}) biotech'
+
+# Cap the OR-ed role list to stay within search engine query length limits
+_MAX_ROLES_PER_QUERY = 20
+
+# Fields exposed when search results are converted to plain dicts
+_RESULT_KEYS = ("title", "url", "snippet", "source")
+_get_result_fields = attrgetter(*_RESULT_KEYS)
+
+# LinkedIn result titles: "Name - Role at Company | LinkedIn"
+_LINKEDIN_TITLE_RE = re.compile(r"^(?P<name>.+?) - (?P<role>.+?)(?:\s*\|\s*LinkedIn.*)?$")
 
 
 class BaseSearchClient(ABC):
@@ -19,6 +54,30 @@ class BaseSearchClient(ABC):
     def search(self, query: str, num_results: int = 10) -> List[SearchResult]:
         """Perform web search and return results"""
         pass
+    
+    def search_many(
+        self,
+        queries: List[str],
+        num_results: int = 10,
+        max_workers: Optional[int] = None
+    ) -> List[List[SearchResult]]:
+        """
+        Run several searches concurrently
+        
+        Searches are network-bound, so they are dispatched on a thread pool
+        (the rate limiter still paces the requests). A query that fails after
+        retries yields an empty list instead of failing the batch.
+        
+        Returns:
+            One result list per query, in query order
+        """
+        return map_concurrently(
+            lambda query: self.search(query, num_results),
+            queries,
+            max_workers,
+            default_factory=list,
+            task="Search"
+        )
 
 
 class SerpAPIClient(BaseSearchClient):
@@ -33,12 +92,15 @@ class SerpAPIClient(BaseSearchClient):
             raise ValueError("SERPAPI_KEY not set")
         
         self.base_url = "https://serpapi.com/search"
+        self._session = http_session
         logger.info("Initialized SerpAPI client")
     
     @retry_with_backoff(exceptions=(requests.RequestException,))
+    @cached(expire=86400)  # Cache for 24 hours
     def search(self, query: str, num_results: int = 10) -> List[SearchResult]:
         """Search using SerpAPI"""
-        rate_limiter.wait()
+        limiter = rate_limiter_for(self.base_url)
+        limiter.wait()
         
         params = {
             "q": query,
@@ -48,39 +110,29 @@ class SerpAPIClient(BaseSearchClient):
         }
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=30)
+            response = self._session.get(self.base_url, params=params, timeout=30)
             response.raise_for_status()
-            data = response.json()
-            
-            results = []
+            limiter.update_from_headers(response.headers)
+            data = orjson.loads(response.content)
             
             # Parse organic results
-            for item in data.get("organic_results", [])[:num_results]:
-                results.append(SearchResult(
-                    title=item.get("title", ""),
-                    url=item.get("link", ""),
-                    snippet=item.get("snippet", ""),
-                    source="serpapi"
-                ))
+            organic = _parse_results(data.get("organic_results", ()), "serpapi")
+            results = list(islice(organic, num_results))
             
             # Parse news results if available
-            for item in data.get("news_results", [])[:max(0, num_results - len(results))]:
-                results.append(SearchResult(
-                    title=item.get("title", ""),
-                    url=item.get("link", ""),
-                    snippet=item.get("snippet", ""),
-                    source="serpapi_news"
-                ))
+            news = _parse_results(data.get("news_results", ()), "serpapi_news")
+            results.extend(islice(news, max(0, num_results - len(results))))
             
             logger.info(f"SerpAPI returned {len(results)} results for query: {query[:50]}...")
-            return results[:num_results]
+            return results
             
         except requests.RequestException as e:
             logger.error(f"SerpAPI request failed: {e}")
             raise
         except Exception as e:
+            # Re-raise rather than return [] so the failure is not cached
             logger.error(f"SerpAPI unexpected error: {e}")
-            return []
+            raise
 
 
 class SerperClient(BaseSearchClient):
@@ -95,13 +147,15 @@ class SerperClient(BaseSearchClient):
             raise ValueError("SERPER_API_KEY not set")
         
         self.base_url = "https://google.serper.dev/search"
+        self._session = http_session
         logger.info("Initialized Serper client")
     
     @retry_with_backoff(exceptions=(requests.RequestException,))
     @cached(expire=86400)  # Cache for 24 hours
     def search(self, query: str, num_results: int = 10) -> List[SearchResult]:
         """Search using Serper"""
-        rate_limiter.wait()
+        limiter = rate_limiter_for(self.base_url)
+        limiter.wait()
         
         headers = {
             "X-API-KEY": self.api_key,
@@ -114,44 +168,34 @@ class SerperClient(BaseSearchClient):
         }
         
         try:
-            response = requests.post(
+            response = self._session.post(
                 self.base_url,
                 headers=headers,
                 json=payload,
                 timeout=30
             )
             response.raise_for_status()
-            data = response.json()
-            
-            results = []
+            limiter.update_from_headers(response.headers)
+            data = orjson.loads(response.content)
             
             # Parse organic results
-            for item in data.get("organic", [])[:num_results]:
-                results.append(SearchResult(
-                    title=item.get("title", ""),
-                    url=item.get("link", ""),
-                    snippet=item.get("snippet", ""),
-                    source="serper"
-                ))
+            organic = _parse_results(data.get("organic", ()), "serper")
+            results = list(islice(organic, num_results))
             
             # Parse news results
-            for item in data.get("news", [])[:max(0, num_results - len(results))]:
-                results.append(SearchResult(
-                    title=item.get("title", ""),
-                    url=item.get("link", ""),
-                    snippet=item.get("snippet", ""),
-                    source="serper_news"
-                ))
+            news = _parse_results(data.get("news", ()), "serper_news")
+            results.extend(islice(news, max(0, num_results - len(results))))
             
             logger.info(f"Serper returned {len(results)} results for query: {query[:50]}...")
-            return results[:num_results]
+            return results
             
         except requests.RequestException as e:
             logger.error(f"Serper request failed: {e}")
             raise
         except Exception as e:
+            # Re-raise rather than return [] so the failure is not cached
             logger.error(f"Serper unexpected error: {e}")
-            return []
+            raise
 
 
 class SearchClient:
@@ -179,6 +223,15 @@ class SearchClient:
         """Perform web search"""
         return self.client.search(query, num_results)
     
+    def search_many(
+        self,
+        queries: List[str],
+        num_results: int = 10,
+        max_workers: Optional[int] = None
+    ) -> List[List[SearchResult]]:
+        """Run several searches concurrently, one result list per query"""
+        return self.client.search_many(queries, num_results, max_workers)
+    
     def search_companies(
         self,
         query: str,
@@ -189,11 +242,19 @@ class SearchClient:
         Search specifically for biotech companies
         Automatically enhances query for better results
         """
-        # Enhance query for biotech company discovery
-        if biotech_focus and "biotech" not in query.lower():
-            query = f"{query} biotech company"
-        
-        return self.search(query, num_results)
+        return self.search(_company_query(query, biotech_focus), num_results)
+    
+    def search_companies_many(
+        self,
+        queries: List[str],
+        num_results: int = 10,
+        biotech_focus: bool = True
+    ) -> List[List[SearchResult]]:
+        """Concurrent version of search_companies, one result list per query"""
+        return self.search_many(
+            [_company_query(q, biotech_focus) for q in queries],
+            num_results
+        )
     
     def search_decision_makers(
         self,
@@ -206,47 +267,94 @@ class SearchClient:
         
         Args:
             company_name: Name of the company
-            roles: List of roles to search for (CEO, CFO, etc.)
+            roles: List of roles to search for (CEO, CFO, etc.), at most 20
             max_results: Maximum number of results
         """
+        # NOTE: single request per company - roles are OR-ed into one query,
+        # never searched one at a time
+        # Build search query (the default role clause is prebuilt at import)
         if roles is None:
-            roles = [
-                "CEO", "Chief Executive Officer",
-                "Founder", "Co-founder",
-                "CMO", "Chief Medical Officer",
-                "CSO", "Chief Scientific Officer",
-                "VP Clinical Development",
-                "Head of R&D"
-            ]
-        
-        # Build search query
-        role_query = " OR ".join([f'"{role}"' for role in roles])
-        query = f'site:linkedin.com/in "{company_name}" ({role_query}) biotech'
+            role_query = _DEFAULT_ROLE_QUERY
+        else:
+            if len(roles) > _MAX_ROLES_PER_QUERY:
+                raise ValueError(
+                    f"At most {_MAX_ROLES_PER_QUERY} roles can be searched per company, "
+                    f"got {len(roles)}"
+                )
+            role_query = " OR ".join(f'"{role}"' for role in roles)
+        query = _DECISION_MAKER_QUERY_TEMPLATE.format(
+            company=company_name, role_query=role_query
+        )
         
         return self.search(query, max_results)
 
 
+def _company_query(query: str, biotech_focus: bool = True) -> str:
+    """Enhance query for biotech company discovery"""
+    if biotech_focus and "biotech" not in query.lower():
+        return f"{query} biotech company"
+    return query
+
+
 # Convenience functions for direct use
-def web_search_companies(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+def web_search_companies(
+    query: Union[str, List[str]],
+    max_results: int = 10
+) -> List[Dict[str, Any]]:
     """
     Search for biotech companies (backwards compatible with original code)
     
+    Args:
+        query: A query, or a list of queries to search concurrently
+        max_results: Maximum results per query
+    
     Returns:
         List of dicts with title, url, snippet, source
+        (results for multiple queries are concatenated in query order)
     """
     client = SearchClient()
-    results = client.search_companies(query, max_results)
+    if isinstance(query, str):
+        results = client.search_companies(query, max_results)
+    else:
+        results = [
+            r for batch in client.search_companies_many(query, max_results)
+            for r in batch
+        ]
     
     # Convert to dict format for backwards compatibility
-    return [
-        {
-            "title": r.title,
-            "url": r.url,
-            "snippet": r.snippet,
-            "source": r.source
-        }
-        for r in results
-    ]
+    return search_results_to_dicts(results)
+
+
+async def async_web_search_companies(
+    query: Union[str, List[str]],
+    max_results: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Async variant of web_search_companies for callers on an event loop
+    
+    The blocking search runs in the loop's default thread pool, so other
+    coroutines keep running while the request is in flight.
+    """
+    return await asyncio.to_thread(web_search_companies, query, max_results)
+
+
+def _parse_results(items: List[Dict[str, Any]], source: str) -> Iterator[SearchResult]:
+    """Build SearchResults from raw provider items, skipping invalid ones"""
+    for item in items:
+        try:
+            yield SearchResult(
+                title=item.get("title", ""),
+                url=item.get("link", ""),
+                snippet=item.get("snippet", ""),
+                source=source
+            )
+        except (AttributeError, ValueError) as e:
+            logger.debug(f"Skipping invalid {source} result: {e}")
+
+
+def search_results_to_dicts(results: List[SearchResult]) -> List[Dict[str, Any]]:
+    """Convert search results to dicts with title, url, snippet, source"""
+    return [dict(zip(_RESULT_KEYS, _get_result_fields(r))) for r in results]
 
 
 def find_decision_makers_for_company(
@@ -262,7 +370,52 @@ def find_decision_makers_for_company(
     """
     client = SearchClient()
     results = client.search_decision_makers(company_name, max_results=max_people)
+    return _parse_linkedin_results(results)
+
+
+def find_decision_makers_batch(
+    company_names: List[str],
+    max_people: int = 5,
+    client: Optional[SearchClient] = None,
+    max_workers: Optional[int] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Find decision makers for many companies concurrently
+    
+    One LinkedIn search is issued per company on a thread pool of
+    max_workers, sharing a single client (and its rate limiter).
+    
+    Args:
+        company_names: Names of the companies
+        max_people: Maximum people per company
+        client: Search client to use (default: a new SearchClient)
+        max_workers: Max concurrent searches (None = use config default)
+    
+    Returns:
+        Dict mapping company name to a list of people dicts
+        (see find_decision_makers_for_company)
+    """
+    if not company_names:
+        return {}
+    
+    client = client or SearchClient()
+    
+    def _find_one(company_name: str) -> List[Dict[str, Any]]:
+        results = client.search_decision_makers(company_name, max_results=max_people)
+        return _parse_linkedin_results(results)
     
+    people = map_concurrently(
+        _find_one,
+        company_names,
+        max_workers,
+        default_factory=list,
+        task="Decision maker search"
+    )
+    return dict(zip(company_names, people))
+
+
+def _parse_linkedin_results(results: List[SearchResult]) -> List[Dict[str, Any]]:
+    """Extract name/role people dicts from LinkedIn search results"""
     people = []
     for result in results:
         # Parse LinkedIn profile data from search result
@@ -271,10 +424,10 @@ def find_decision_makers_for_company(
         
         # Try to extract name and role from title
         # Format is usually: "Name - Role at Company | LinkedIn"
-        if " - " in result.title:
-            parts = result.title.split(" - ", 1)
-            name = parts[0].strip()
-            role = parts[1].replace(" | LinkedIn", "").strip()
+        match = _LINKEDIN_TITLE_RE.match(result.title)
+        if match:
+            name = match["name"].strip()
+            role = match["role"].strip()
         
         people.append({
             "name": name,